@@ -6,20 +6,63 @@ Two levels of analysis:
 """
 from __future__ import annotations
 
-import json
 import logging
+import re
+from typing import TYPE_CHECKING
 
 import anthropic
+import orjson
 
 import config
+from ai.throttle import AsyncRateLimiter
+
+if TYPE_CHECKING:
+    from twitter.top_tweets import Tweet
 
 logger = logging.getLogger(__name__)
 
-_client = anthropic.Anthropic(api_key=config.ANTHROPIC_API_KEY)
+_client = anthropic.AsyncAnthropic(api_key=config.ANTHROPIC_API_KEY)
+_limiter = AsyncRateLimiter(rpm=config.ANTHROPIC_RPM, tpm=config.ANTHROPIC_TPM)
 
 # Models
 _PER_USER_MODEL = "claude-sonnet-4-6"   # fast + cost-efficient for 20 individual analyses
 _GLOBAL_MODEL = "claude-opus-4-6"       # deeper synthesis for the final summary
+_PER_USER_MAX_TOKENS = 1024
+_GLOBAL_MAX_TOKENS = 2048
+
+
+def _estimate_tokens(system: str, prompt: str, max_tokens: int) -> int:
+    """Rough token budget for the limiter: ~4 chars per input token plus max output."""
+    return (len(system) + len(prompt)) // 4 + max_tokens
+
+
+# Captures the JSON object whether or not the model wrapped it in ```json fences;
+# anything after the closing fence (e.g. "Hope this helps!") is ignored
+_FENCE_RE = re.compile(r"^\s*(?:```(?:json)?\s*)?(\{.*?\})\s*(?:```.*)?$", re.DOTALL)
+
+
+def _cached_system(text: str) -> list[dict]:
+    """System prompt as a content block marked for Anthropic prompt caching.
+
+    At the current prompt sizes the marker has no effect: the system prompts
+    (~180 tokens for the per-user one) are far below the minimum cacheable
+    prefix, and the per-user calls are issued concurrently, so none could
+    read a cache entry another wrote. It only starts to pay off if a long,
+    shared prefix is added and the first call is made before the rest.
+    """
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+
+def _parse_json(text: str) -> dict:
+    """Decode a model reply with one regex match and one parse."""
+    m = _FENCE_RE.match(text)
+    return orjson.loads(m.group(1) if m else text)
+
+
+async def aclose() -> None:
+    """Close the shared Anthropic client; call before the event loop exits."""
+    await _client.close()
+
 
 # ── Per-user ──────────────────────────────────────────────────────────────────
 
@@ -40,17 +83,31 @@ Return ONLY valid JSON (no markdown fences) with these keys:
 """
 
 
-def _build_per_user_prompt(user: dict, tweets: list[dict]) -> str:
+_TWEET_TPL = (
+    "Tweet {i} (engagement score {score:.0f}):\n"
+    "Text: {text}\n"
+    "Likes: {like} | Retweets: {rt} | Replies: {rep} | Quotes: {qt}\n"
+    "Posted: {posted}\n"
+    "URL: {url}"
+)
+
+
+def _build_per_user_prompt(user: dict, tweets: list[Tweet]) -> str:
     tweets_block = "\n\n".join(
-        f"Tweet {i + 1} (engagement score {t['score']:.0f}):\n"
-        f"Text: {t['text']}\n"
-        f"Likes: {t['metrics'].get('like_count', 0)} | "
-        f"Retweets: {t['metrics'].get('retweet_count', 0)} | "
-        f"Replies: {t['metrics'].get('reply_count', 0)} | "
-        f"Quotes: {t['metrics'].get('quote_count', 0)}\n"
-        f"Posted: {t['created_at']}\n"
-        f"URL: {t.get('url', '')}"
-        for i, t in enumerate(tweets)
+        _TWEET_TPL.format_map(
+            {
+                "i": i,
+                "score": t.score,
+                "text": t.text,
+                "like": t.metrics.get("like_count", 0),
+                "rt": t.metrics.get("retweet_count", 0),
+                "rep": t.metrics.get("reply_count", 0),
+                "qt": t.metrics.get("quote_count", 0),
+                "posted": t.created_at,
+                "url": t.url,
+            }
+        )
+        for i, t in enumerate(tweets, start=1)
     )
     followers = (
         user.get("public_metrics", {}).get("followers_count", "N/A")
@@ -65,27 +122,24 @@ def _build_per_user_prompt(user: dict, tweets: list[dict]) -> str:
     )
 
 
-def per_user_analysis(user: dict, tweets: list[dict]) -> dict:
+async def per_user_analysis(user: dict, tweets: list[Tweet]) -> dict:
     """Return a structured engagement analysis for a single user.
 
     Falls back to a dict with a 'raw_response' key if JSON parsing fails.
     """
     prompt = _build_per_user_prompt(user, tweets)
+    estimated = _estimate_tokens(_PER_USER_SYSTEM, prompt, _PER_USER_MAX_TOKENS)
     try:
-        message = _client.messages.create(
-            model=_PER_USER_MODEL,
-            max_tokens=1024,
-            system=_PER_USER_SYSTEM,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        text = message.content[0].text.strip()
-        # Strip markdown code fences if the model wrapped the JSON
-        if text.startswith("```"):
-            text = text.split("```")[1]
-            if text.startswith("json"):
-                text = text[4:]
-        return json.loads(text)
-    except json.JSONDecodeError as exc:
+        async with _limiter.reserve(estimated_tokens=estimated):
+            message = await _client.messages.create(
+                model=_PER_USER_MODEL,
+                max_tokens=_PER_USER_MAX_TOKENS,
+                system=_cached_system(_PER_USER_SYSTEM),
+                messages=[{"role": "user", "content": prompt}],
+            )
+        text = message.content[0].text
+        return _parse_json(text)
+    except orjson.JSONDecodeError as exc:
         logger.warning("JSON parse failed for @%s: %s", user.get("username"), exc)
         return {"user_handle": user.get("username"), "raw_response": text}
     except anthropic.APIError as exc:
@@ -114,7 +168,10 @@ Return ONLY valid JSON (no markdown fences) with these keys:
 
 
 def _build_global_prompt(per_user_analyses: list[dict], target_username: str) -> str:
-    block = json.dumps(per_user_analyses, indent=2)
+    # Compact JSON without unparsed model output: the model gains nothing from
+    # indentation or raw_response blobs, and both cost input tokens
+    slim = [{k: v for k, v in a.items() if k != "raw_response"} for a in per_user_analyses]
+    block = orjson.dumps(slim).decode()
     return (
         f"Here are the analyses for @{target_username}'s top interaction partners:\n\n"
         f"{block}\n\n"
@@ -122,27 +179,25 @@ def _build_global_prompt(per_user_analyses: list[dict], target_username: str) ->
     )
 
 
-def global_summary(per_user_analyses: list[dict], target_username: str) -> dict:
+async def global_summary(per_user_analyses: list[dict], target_username: str) -> dict:
     """Return a cross-user engagement synthesis for the target account.
 
     Falls back to a dict with a 'raw_response' key if JSON parsing fails.
     """
     system = _GLOBAL_SYSTEM.replace("{target}", target_username)
     prompt = _build_global_prompt(per_user_analyses, target_username)
+    estimated = _estimate_tokens(system, prompt, _GLOBAL_MAX_TOKENS)
     try:
-        message = _client.messages.create(
-            model=_GLOBAL_MODEL,
-            max_tokens=2048,
-            system=system,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        text = message.content[0].text.strip()
-        if text.startswith("```"):
-            text = text.split("```")[1]
-            if text.startswith("json"):
-                text = text[4:]
-        return json.loads(text)
-    except json.JSONDecodeError as exc:
+        async with _limiter.reserve(estimated_tokens=estimated):
+            message = await _client.messages.create(
+                model=_GLOBAL_MODEL,
+                max_tokens=_GLOBAL_MAX_TOKENS,
+                system=_cached_system(system),
+                messages=[{"role": "user", "content": prompt}],
+            )
+        text = message.content[0].text
+        return _parse_json(text)
+    except orjson.JSONDecodeError as exc:
         logger.warning("JSON parse failed for global summary: %s", exc)
         return {"raw_response": text}
     except anthropic.APIError as exc:
@@ -0,0 +1,63 @@
+"""Proactive request/token throttling for concurrent Claude calls.
+
+Keeps a burst of async requests just under the account's RPM / TPM limits so
+they never trip a 429 and the SDK's exponential-backoff retries.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+
+class _TokenBucket:
+    """Capacity that refills linearly up to `per_minute` over sixty seconds."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it already is)."""
+        return max(0.0, (amount - self.available) / self._rate)
+
+
+class AsyncRateLimiter:
+    """Two token buckets (requests and tokens per minute) shared by all callers.
+
+    Capacity is refilled lazily from the monotonic clock on every reservation
+    rather than by a background task, so the limiter is not tied to one event
+    loop and needs no lock: check-and-deduct never awaits in between.
+    """
+
+    def __init__(self, rpm: float = 40, tpm: float = 16000) -> None:
+        self._requests = _TokenBucket(rpm)
+        self._tokens = _TokenBucket(tpm)
+
+    @asynccontextmanager
+    async def reserve(self, estimated_tokens: int) -> AsyncIterator[None]:
+        """Wait until one request and `estimated_tokens` tokens are available."""
+        # A single request larger than the whole bucket would wait forever
+        tokens = min(float(estimated_tokens), self._tokens.capacity)
+        while True:
+            self._requests.refill()
+            self._tokens.refill()
+            delay = max(self._requests.wait_time(1), self._tokens.wait_time(tokens))
+            if delay == 0:
+                break
+            logger.debug("Rate limiter: waiting %.2fs for capacity", delay)
+            await asyncio.sleep(delay)
+        self._requests.available -= 1
+        self._tokens.available -= tokens
+        yield
@@ -1,15 +1,28 @@
 """Lightweight JSON file cache with TTL support.
 
-Cache files are stored in `.cache/` inside the project root (gitignored).
-Keys are namespaced to avoid collisions between different data types.
+Cache files are stored in `.cache/<namespace>/` inside the project root
+(gitignored), one file per identifier, so different data types never collide
+and a namespace can be listed with a glob.
+
+Entries read or written during a run are also kept in an in-process LRU, so
+repeated lookups of the same key skip the disk read and JSON parse.
+
+Namespaces written in batches (`bulk_set`) live in a single shard file,
+`.cache/<namespace>/@shard.json`, which is parsed at most once per run.
 """
 from __future__ import annotations
 
+import functools
 import hashlib
-import json
 import logging
+import os
 import time
+from collections import OrderedDict
 from pathlib import Path
+from typing import Iterable
+from urllib.parse import quote
+
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -17,26 +30,106 @@ _CACHE_DIR = Path(__file__).parent.parent / ".cache"
 _CACHE_DIR.mkdir(exist_ok=True)
 
 
+# Quoted identifiers longer than this are hashed to stay under filename limits
+_MAX_NAME_LEN = 200
+
+# quote() always escapes "@", so no identifier can map to this filename
+_SHARD_NAME = "@shard.json"
+
+_namespace_dirs: dict[str, Path] = {}
+
+# Parsed shard files: namespace → {identifier: {"cached_at": ..., "data": ...}}
+_shards: dict[str, dict[str, dict]] = {}
+
+# In-memory layer: (namespace, identifier) → (cached_at, data), LRU-ordered
+_MEM_MAXSIZE = 1024
+_mem: OrderedDict[tuple[str, str], tuple[float, object]] = OrderedDict()
+
+
+def _remember(key: tuple[str, str], cached_at: float, data: object) -> None:
+    _mem[key] = (cached_at, data)
+    _mem.move_to_end(key)
+    if len(_mem) > _MEM_MAXSIZE:
+        _mem.popitem(last=False)
+
+
+def _namespace_dir(namespace: str) -> Path:
+    """Return `.cache/<namespace>/`, creating it once per process."""
+    path = _namespace_dirs.get(namespace)
+    if path is None:
+        path = _CACHE_DIR / namespace
+        path.mkdir(exist_ok=True)
+        _namespace_dirs[namespace] = path
+    return path
+
+
+@functools.lru_cache(maxsize=2048)
 def _key_path(namespace: str, identifier: str) -> Path:
-    h = hashlib.md5(f"{namespace}:{identifier}".encode()).hexdigest()
-    return _CACHE_DIR / f"{h}.json"
+    name = quote(identifier, safe="")
+    if len(name) > _MAX_NAME_LEN:
+        name = hashlib.blake2b(identifier.encode(), digest_size=16).hexdigest()
+    return _namespace_dir(namespace) / f"{name}.json"
+
+
+def _shard(namespace: str) -> dict[str, dict]:
+    """Return the namespace's shard entries, reading the file on first use."""
+    entries = _shards.get(namespace)
+    if entries is None:
+        path = _namespace_dir(namespace) / _SHARD_NAME
+        entries = {}
+        if path.exists():
+            try:
+                entries = orjson.loads(path.read_bytes())
+            except (orjson.JSONDecodeError, OSError) as exc:
+                logger.warning("Corrupt cache shard for %s — %s", namespace, exc)
+                path.unlink(missing_ok=True)
+        _shards[namespace] = entries
+    return entries
+
+
+def _write_shard(namespace: str) -> None:
+    path = _namespace_dir(namespace) / _SHARD_NAME
+    tmp = path.with_suffix(".tmp")
+    try:
+        tmp.write_bytes(orjson.dumps(_shards[namespace]))
+        os.replace(tmp, path)
+    except (OSError, orjson.JSONEncodeError) as exc:
+        logger.warning("Could not write cache shard for %s — %s", namespace, exc)
 
 
 def get(namespace: str, identifier: str, ttl_hours: float = 24) -> object | None:
     """Return cached data, or None if absent / expired."""
+    key = (namespace, identifier)
+    hit = _mem.get(key)
+    if hit is not None:
+        cached_at, data = hit
+        if (time.time() - cached_at) / 3600 <= ttl_hours:
+            _mem.move_to_end(key)
+            return data
+        del _mem[key]  # expired: fall through so the file is removed too
+
+    entry = _shard(namespace).get(identifier)
+    if entry is not None:
+        # The shard is already held in memory, so it skips the LRU layer
+        if (time.time() - entry["cached_at"]) / 3600 <= ttl_hours:
+            return entry["data"]
+        logger.debug("Cache expired for %s:%s", namespace, identifier)
+        return None
+
     path = _key_path(namespace, identifier)
     if not path.exists():
         return None
     try:
-        entry = json.loads(path.read_text())
+        entry = orjson.loads(path.read_bytes())
         age_hours = (time.time() - entry["cached_at"]) / 3600
         if age_hours > ttl_hours:
             path.unlink(missing_ok=True)
             logger.debug("Cache expired for %s:%s", namespace, identifier)
             return None
         logger.debug("Cache hit for %s:%s (age %.1fh)", namespace, identifier, age_hours)
+        _remember(key, entry["cached_at"], entry["data"])
         return entry["data"]
-    except (json.JSONDecodeError, KeyError, OSError) as exc:
+    except (orjson.JSONDecodeError, KeyError, OSError) as exc:
         logger.warning("Corrupt cache entry for %s:%s — %s", namespace, identifier, exc)
         path.unlink(missing_ok=True)
         return None
@@ -44,21 +137,70 @@ def get(namespace: str, identifier: str, ttl_hours: float = 24) -> object | None
 
 def set(namespace: str, identifier: str, data: object) -> None:  # noqa: A001
     """Write data to cache."""
+    cached_at = time.time()
+    _remember((namespace, identifier), cached_at, data)
     path = _key_path(namespace, identifier)
     try:
-        path.write_text(json.dumps({"cached_at": time.time(), "data": data}))
+        path.write_bytes(orjson.dumps({"cached_at": cached_at, "data": data}))
         logger.debug("Cached %s:%s", namespace, identifier)
-    except OSError as exc:
+    except (OSError, orjson.JSONEncodeError) as exc:
         logger.warning("Could not write cache for %s:%s — %s", namespace, identifier, exc)
 
 
+def get_many(
+    namespace: str, identifiers: Iterable[str], ttl_hours: float = 24
+) -> dict[str, object]:
+    """Return {identifier: data} for the unexpired entries among `identifiers`.
+
+    Only the namespace's shard is consulted (no per-key files, no LRU), so
+    this is for namespaces written exclusively through `bulk_set`.
+    """
+    shard = _shard(namespace)
+    cutoff = time.time() - ttl_hours * 3600
+    found: dict[str, object] = {}
+    for identifier in identifiers:
+        entry = shard.get(identifier)
+        if entry is not None and entry["cached_at"] >= cutoff:
+            found[identifier] = entry["data"]
+    return found
+
+
+def bulk_set(
+    namespace: str, entries: dict[str, object], ttl_hours: float | None = None
+) -> None:
+    """Write many entries of one namespace to its shard file in a single write.
+
+    With `ttl_hours`, entries older than that are dropped from the shard
+    before it is rewritten, so a namespace written every run stays bounded.
+    """
+    if not entries:
+        return
+    cached_at = time.time()
+    shard = _shard(namespace)
+    if ttl_hours is not None:
+        cutoff = cached_at - ttl_hours * 3600
+        for identifier in [i for i, entry in shard.items() if entry["cached_at"] < cutoff]:
+            del shard[identifier]
+            _mem.pop((namespace, identifier), None)
+    for identifier, data in entries.items():
+        _mem.pop((namespace, identifier), None)  # a stale per-key copy must not shadow it
+        shard[identifier] = {"cached_at": cached_at, "data": data}
+    _write_shard(namespace)
+    logger.debug("Cached %d entries for %s", len(entries), namespace)
+
+
 def invalidate(namespace: str, identifier: str) -> None:
     """Remove a specific cache entry."""
+    _mem.pop((namespace, identifier), None)
     _key_path(namespace, identifier).unlink(missing_ok=True)
+    if _shard(namespace).pop(identifier, None) is not None:
+        _write_shard(namespace)
 
 
 def clear_all() -> None:
     """Remove all cache files."""
-    for f in _CACHE_DIR.glob("*.json"):
+    _mem.clear()
+    _shards.clear()
+    for f in _CACHE_DIR.rglob("*.json"):
         f.unlink(missing_ok=True)
     logger.info("Cache cleared.")
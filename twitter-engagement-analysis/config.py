@@ -34,6 +34,9 @@ OAUTH_AVAILABLE: bool = all(
 
 # Anthropic
 ANTHROPIC_API_KEY: str = _require("ANTHROPIC_API_KEY")
+# Client-side throttle for concurrent Claude calls; set to your tier's limits
+ANTHROPIC_RPM: int = int(_optional("ANTHROPIC_RPM", "40"))
+ANTHROPIC_TPM: int = int(_optional("ANTHROPIC_TPM", "16000"))
 
 # Tuning
 TARGET_USERNAME: str = _optional("TARGET_USERNAME", "gianpaj")
@@ -15,16 +15,21 @@ Steps:
 from __future__ import annotations
 
 import argparse
+import asyncio
+import hashlib
+import heapq
 import logging
 import sys
 
-import tweepy
+import httpx
+import orjson
 
 import config
 from cache import disk_cache as cache
-from twitter.client import make_app_client, make_user_client
+from twitter.client import get as twitter_get
+from twitter.client import make_client, make_user_auth
 from twitter.user_interactions import build_interaction_scores
-from twitter.top_tweets import fetch_top_tweets
+from twitter.top_tweets import Tweet, as_tweets, fetch_top_tweets_async
 from ai import analyzer
 from report import builder
 
@@ -40,44 +45,115 @@ _TTL_SCORES = config.CACHE_TTL_HOURS
 _TTL_TWEETS = 6.0
 _TTL_ANALYSIS = 48.0
 
+# Maximum in-flight Twitter requests when fanning out per-partner fetches
+_TWITTER_CONCURRENCY = 5
+# Concurrent Claude per-user analyses consuming the fetched-tweets queue
+_CLAUDE_WORKERS = 5
 
-def resolve_user_id(client: tweepy.Client, username: str) -> str:
+
+async def resolve_user_id(client: httpx.AsyncClient, username: str) -> str:
     cached = cache.get("user_id", username, ttl_hours=168)  # 1 week
     if cached:
         return str(cached)
-    response = client.get_user(username=username, user_fields=["public_metrics"])
-    if not response.data:
+    body = await twitter_get(
+        client, f"/users/by/username/{username}", {"user.fields": ["public_metrics"]}
+    )
+    if "data" not in body:
         logger.error("User @%s not found.", username)
         sys.exit(1)
-    uid = str(response.data.id)
+    uid = body["data"]["id"]
     cache.set("user_id", username, uid)
     return uid
 
 
-def resolve_user_objects(client: tweepy.Client, user_ids: list[str]) -> list[dict]:
+async def resolve_user_objects_async(
+    client: httpx.AsyncClient, user_ids: list[str]
+) -> list[dict]:
     """Fetch full user objects for a list of IDs."""
-    # Twitter API accepts up to 100 IDs per call
-    users = []
-    for i in range(0, len(user_ids), 100):
-        batch = user_ids[i : i + 100]
-        response = client.get_users(
-            ids=batch,
-            user_fields=["username", "name", "public_metrics", "description"],
+    # Twitter API accepts up to 100 IDs per call; request all batches at once
+    batches = [user_ids[i : i + 100] for i in range(0, len(user_ids), 100)]
+    user_fields = ["username", "name", "public_metrics", "description"]
+    bodies = await asyncio.gather(
+        *(
+            twitter_get(client, "/users", {"ids": batch, "user.fields": user_fields})
+            for batch in batches
         )
-        for u in response.data or []:
-            users.append(
-                {
-                    "id": str(u.id),
-                    "username": u.username,
-                    "name": u.name,
-                    "public_metrics": dict(u.public_metrics) if u.public_metrics else {},
-                    "description": getattr(u, "description", ""),
-                }
-            )
-    return users
-
-
-def main() -> None:
+    )
+    return [
+        {
+            "id": u["id"],
+            "username": u["username"],
+            "name": u["name"],
+            "public_metrics": u.get("public_metrics", {}),
+            "description": u.get("description", ""),
+        }
+        for body in bodies
+        for u in body.get("data", [])
+    ]
+
+
+async def _fetch_and_analyse(
+    client: httpx.AsyncClient, top_users: list[dict], top_tweets_n: int
+) -> None:
+    """Steps 5-6 as a producer/consumer pipeline.
+
+    Each partner is queued for Claude analysis as soon as their tweets land,
+    so Twitter and Anthropic I/O overlap instead of running back to back.
+    Results are attached to each user dict as "top_tweets" and "analysis";
+    fresh results are cached with one shard write per namespace at the end.
+    """
+    queue: asyncio.Queue[dict | None] = asyncio.Queue()
+    semaphore = asyncio.Semaphore(_TWITTER_CONCURRENCY)
+    fetched_tweets: dict[str, list[Tweet]] = {}
+    new_analyses: dict[str, dict] = {}
+
+    # ── Step 5 (producer): fetch top tweets for each partner ─────────────────
+    async def fetch(user: dict) -> None:
+        uid = user["id"]
+        cached_tweets = cache.get("user_top_tweets", uid, _TTL_TWEETS)
+        if cached_tweets is not None:
+            user["top_tweets"] = as_tweets(cached_tweets)
+            logger.info("  @%s: top tweets loaded from cache.", user["username"])
+        else:
+            async with semaphore:
+                logger.info("  @%s: fetching top tweets…", user["username"])
+                tweets = await fetch_top_tweets_async(client, uid, n=top_tweets_n)
+            user["top_tweets"] = tweets
+            fetched_tweets[uid] = tweets
+        await queue.put(user)
+
+    async def produce() -> None:
+        await asyncio.gather(*(fetch(u) for u in top_users))
+        for _ in range(_CLAUDE_WORKERS):
+            await queue.put(None)  # one sentinel per consumer
+
+    # ── Step 6 (consumers): per-user Claude analysis ─────────────────────────
+    async def consume() -> None:
+        while (user := await queue.get()) is not None:
+            uid = user["id"]
+            cached_analysis = cache.get("claude_analysis", uid, _TTL_ANALYSIS)
+            if cached_analysis is not None:
+                logger.info("  @%s: analysis loaded from cache.", user["username"])
+                user["analysis"] = cached_analysis
+                continue
+            if not user.get("top_tweets"):
+                logger.warning("  @%s: no tweets available — skipping analysis.", user["username"])
+                continue
+            logger.info("  @%s: running Claude per-user analysis…", user["username"])
+            try:
+                analysis = await analyzer.per_user_analysis(user, user["top_tweets"])
+            except Exception as exc:  # keep the worker alive for the rest of the queue
+                logger.error("  @%s: per-user analysis failed: %s", user["username"], exc)
+                continue
+            user["analysis"] = analysis
+            new_analyses[uid] = analysis
+
+    await asyncio.gather(produce(), *(consume() for _ in range(_CLAUDE_WORKERS)))
+    cache.bulk_set("user_top_tweets", fetched_tweets, ttl_hours=_TTL_TWEETS)
+    cache.bulk_set("claude_analysis", new_analyses, ttl_hours=_TTL_ANALYSIS)
+
+
+async def main() -> None:
     parser = argparse.ArgumentParser(description="Twitter/X engagement analyser")
     parser.add_argument(
         "--clear-cache",
@@ -90,29 +166,33 @@ def main() -> None:
         cache.clear_all()
         logger.info("Cache cleared.")
 
-    app_client = make_app_client()
-    user_client = make_user_client()
-    if user_client is None:
-        logger.warning(
-            "OAuth credentials not set — liked-tweets signal disabled. "
-            "Set TWITTER_API_KEY / ACCESS_TOKEN in .env to enable it."
-        )
+    # One HTTP/2 connection pool for every Twitter call (bearer or OAuth) and
+    # one Anthropic client for every Claude call, all on this event loop
+    async with make_client() as client:
+        try:
+            await _run(client, make_user_auth())
+        finally:
+            await analyzer.aclose()
+
 
+async def _run(client: httpx.AsyncClient, user_auth: httpx.Auth | None) -> None:
     target = config.TARGET_USERNAME
     top_n = config.TOP_N_USERS
     top_tweets_n = config.TOP_N_TWEETS
 
     # ── Step 1: resolve target user ID ───────────────────────────────────────
     logger.info("Resolving @%s…", target)
-    user_id = resolve_user_id(app_client, target)
+    user_id = await resolve_user_id(client, target)
     logger.info("@%s → ID %s", target, user_id)
 
     # ── Step 2: build interaction scores ─────────────────────────────────────
-    scores: dict[str, int] | None = cache.get("interaction_scores", user_id, _TTL_SCORES)
+    # Only the top N partners are kept, so N is part of the key
+    scores_key = f"{user_id}_top{top_n}"
+    scores: dict[str, int] | None = cache.get("interaction_scores", scores_key, _TTL_SCORES)
     if scores is None:
         logger.info("Building interaction graph for @%s…", target)
-        scores = build_interaction_scores(user_id, app_client, user_client)
-        cache.set("interaction_scores", user_id, scores)
+        scores = await build_interaction_scores(user_id, client, user_auth, top_k=top_n)
+        cache.set("interaction_scores", scores_key, scores)
     else:
         logger.info("Loaded interaction scores from cache (%d partners).", len(scores))
 
@@ -121,7 +201,7 @@ def main() -> None:
         sys.exit(1)
 
     # ── Step 3: select top N interaction partners ─────────────────────────────
-    top_ids = sorted(scores, key=lambda uid: scores[uid], reverse=True)[:top_n]
+    top_ids = heapq.nlargest(top_n, scores, key=scores.get)
     if len(top_ids) < top_n:
         logger.warning(
             "Only %d interaction partners found (wanted %d).", len(top_ids), top_n
@@ -130,7 +210,7 @@ def main() -> None:
     logger.info("Top %d partners by interaction score: %s", len(top_ids), top_ids[:5])
 
     # ── Step 4: resolve user objects ─────────────────────────────────────────
-    top_users_raw = resolve_user_objects(app_client, top_ids)
+    top_users_raw = await resolve_user_objects_async(client, top_ids)
     # Attach interaction scores and preserve rank order
     id_to_user = {u["id"]: u for u in top_users_raw}
     top_users: list[dict] = []
@@ -140,50 +220,30 @@ def main() -> None:
             user["interaction_score"] = scores[uid]
             top_users.append(user)
 
-    # ── Step 5: fetch top tweets for each partner ─────────────────────────────
-    for user in top_users:
-        uid = user["id"]
-        cached_tweets = cache.get("user_top_tweets", uid, _TTL_TWEETS)
-        if cached_tweets is not None:
-            user["top_tweets"] = cached_tweets
-            logger.info("  @%s: top tweets loaded from cache.", user["username"])
-        else:
-            logger.info("  @%s: fetching top tweets…", user["username"])
-            tweets = fetch_top_tweets(app_client, uid, n=top_tweets_n)
-            user["top_tweets"] = tweets
-            cache.set("user_top_tweets", uid, tweets)
+    # ── Steps 5-6: fetch tweets → Claude analysis pipeline ───────────────────
+    await _fetch_and_analyse(client, top_users, top_tweets_n)
 
-    # ── Step 6: per-user Claude analysis ─────────────────────────────────────
-    per_user_analyses: list[dict] = []
-    for user in top_users:
-        uid = user["id"]
-        cached_analysis = cache.get("claude_analysis", uid, _TTL_ANALYSIS)
-        if cached_analysis is not None:
-            logger.info("  @%s: analysis loaded from cache.", user["username"])
-            per_user_analyses.append(cached_analysis)
-        else:
-            if not user.get("top_tweets"):
-                logger.warning("  @%s: no tweets available — skipping analysis.", user["username"])
-                continue
-            logger.info("  @%s: running Claude per-user analysis…", user["username"])
-            analysis = analyzer.per_user_analysis(user, user["top_tweets"])
-            per_user_analyses.append(analysis)
-            cache.set("claude_analysis", uid, analysis)
+    # Rank order regardless of completion order
+    per_user_analyses = [u["analysis"] for u in top_users if "analysis" in u]
 
     # ── Step 7: global summary ────────────────────────────────────────────────
-    global_cache_key = f"{user_id}_global"
+    # Keyed on the analyses' content so any regenerated analysis rebuilds the summary
+    digest = hashlib.blake2b(
+        orjson.dumps(per_user_analyses, option=orjson.OPT_SORT_KEYS), digest_size=8
+    ).hexdigest()
+    global_cache_key = f"{user_id}_{digest}"
     global_summ = cache.get("global_summary", global_cache_key, _TTL_ANALYSIS)
     if global_summ is not None:
         logger.info("Global summary loaded from cache.")
     else:
         logger.info("Running Claude global summary…")
-        global_summ = analyzer.global_summary(per_user_analyses, target)
+        global_summ = await analyzer.global_summary(per_user_analyses, target)
         cache.set("global_summary", global_cache_key, global_summ)
 
     # ── Step 8: write report ──────────────────────────────────────────────────
-    json_path, md_path = builder.build(target, top_users, per_user_analyses, global_summ)
+    json_path, md_path = builder.build(target, top_users, global_summ)
     print(f"\nReport written:\n  JSON: {json_path}\n  Markdown: {md_path}")
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -1,44 +1,55 @@
 """Assemble per-user summaries and global summary into JSON + Markdown reports."""
 from __future__ import annotations
 
-import json
+import io
 import logging
+import os
 from datetime import datetime, timezone
 from pathlib import Path
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 _OUTPUT_DIR = Path(__file__).parent.parent / "output"
 _OUTPUT_DIR.mkdir(exist_ok=True)
 
 
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write bytes to a sibling temp file, then rename it over `path`.
+
+    Readers never see a half-written report if the process dies mid-write.
+    """
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
 def build(
     target_username: str,
     top_users: list[dict],
-    per_user_analyses: list[dict],
     summary: dict,
 ) -> tuple[Path, Path]:
     """Write JSON and Markdown report files and return their paths.
 
     Args:
         target_username: Handle being analysed (e.g. "gianpaj").
-        top_users: List of user dicts from the Twitter API (username, name, public_metrics, score).
-        per_user_analyses: One dict per user from ai.analyzer.per_user_analysis().
+        top_users: List of user dicts from the Twitter API (username, name, public_metrics, score),
+            each carrying its twitter.top_tweets.Tweet list under "top_tweets" and its
+            ai.analyzer.per_user_analysis() result under "analysis".
         summary: Dict from ai.analyzer.global_summary().
 
     Returns:
         (json_path, markdown_path)
     """
     ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-    analysis_by_handle = {a.get("user_handle", ""): a for a in per_user_analyses}
 
     partners = []
     for rank, user in enumerate(top_users, start=1):
-        handle = user.get("username", "")
         partners.append(
             {
                 "rank": rank,
-                "username": handle,
+                "username": user.get("username", ""),
                 "name": user.get("name", ""),
                 "interaction_score": user.get("interaction_score", 0),
                 "followers": (
@@ -47,7 +58,7 @@ def build(
                     else None
                 ),
                 "top_tweets": user.get("top_tweets", []),
-                "analysis": analysis_by_handle.get(handle, {}),
+                "analysis": user.get("analysis", {}),
             }
         )
 
@@ -61,100 +72,117 @@ def build(
     json_path = _OUTPUT_DIR / f"report_{ts}.json"
     md_path = _OUTPUT_DIR / f"report_{ts}.md"
 
-    json_path.write_text(json.dumps(report, indent=2, ensure_ascii=False))
-    md_path.write_text(_to_markdown(report))
+    _write_atomic(
+        json_path, orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    )
+    _write_atomic(md_path, _to_markdown(report).encode("utf-8"))
 
     logger.info("Report written to %s and %s", json_path, md_path)
     return json_path, md_path
 
 
+_HEADER_TPL = "# Twitter Engagement Analysis: {target}\n_Generated {ts}_\n\n---\n\n"
+_TACTIC_TPL = "**{i}. {tactic}**\n- Rationale: {rationale}\n- Example: _{example}_\n\n"
+_PARTNER_TPL = (
+    "### {rank}. @{handle} — {name}\n"
+    "_Interaction score: {score} | Followers: {followers_str}_\n\n"
+)
+_TWEET_TPL = (
+    "#### Tweet {i} (score {score:.0f})\n"
+    "> {text}\n"
+    "\n"
+    "Likes: {like_count} | RTs: {retweet_count} | "
+    "Replies: {reply_count} | Quotes: {quote_count}\n"
+    "[View tweet]({url})\n"
+    "\n"
+)
+_SEPARATOR = "---\n\n"
+
+
+def _write_bullets(buf: io.StringIO, items: list[str]) -> None:
+    for item in items:
+        buf.write(f"- {item}\n")
+
+
 def _to_markdown(report: dict) -> str:
-    lines: list[str] = []
-    target = report["target_user"]
-    ts = report["generated_at"]
-
-    lines += [
-        f"# Twitter Engagement Analysis: {target}",
-        f"_Generated {ts}_",
-        "",
-        "---",
-        "",
-    ]
+    buf = io.StringIO()
+    buf.write(_HEADER_TPL.format(target=report["target_user"], ts=report["generated_at"]))
 
     # ── Global summary first ─────────────────────────────────────────────────
     gs = report.get("global_summary", {})
     if gs:
-        lines += ["## Overall Strategy & Key Learnings", ""]
+        buf.write("## Overall Strategy & Key Learnings\n\n")
         if "overall_summary" in gs:
-            lines += [gs["overall_summary"], ""]
+            buf.write(f"{gs['overall_summary']}\n\n")
         if "top_tactics" in gs:
-            lines += ["### Top 5 Tactics to Adopt", ""]
+            buf.write("### Top 5 Tactics to Adopt\n\n")
             for i, tactic in enumerate(gs.get("top_tactics", []), start=1):
-                lines += [
-                    f"**{i}. {tactic.get('tactic', '')}**",
-                    f"- Rationale: {tactic.get('rationale', '')}",
-                    f"- Example: _{tactic.get('example', '')}_",
-                    "",
-                ]
+                buf.write(
+                    _TACTIC_TPL.format(
+                        i=i,
+                        tactic=tactic.get("tactic", ""),
+                        rationale=tactic.get("rationale", ""),
+                        example=tactic.get("example", ""),
+                    )
+                )
         if "common_patterns" in gs:
-            lines += ["### Common Patterns", ""]
-            for p in gs.get("common_patterns", []):
-                lines += [f"- {p}"]
-            lines += [""]
+            buf.write("### Common Patterns\n\n")
+            _write_bullets(buf, gs.get("common_patterns", []))
+            buf.write("\n")
         if "tone_spectrum" in gs:
-            lines += [f"**Tone spectrum:** {gs['tone_spectrum']}", ""]
+            buf.write(f"**Tone spectrum:** {gs['tone_spectrum']}\n\n")
         if "content_mix_recommendation" in gs:
-            lines += [f"**Content mix recommendation:** {gs['content_mix_recommendation']}", ""]
-        lines += ["---", ""]
+            buf.write(f"**Content mix recommendation:** {gs['content_mix_recommendation']}\n\n")
+        buf.write(_SEPARATOR)
 
     # ── Per-user sections ────────────────────────────────────────────────────
-    lines += ["## Top 20 Interaction Partners", ""]
+    buf.write("## Top 20 Interaction Partners\n\n")
     for partner in report.get("top_interaction_partners", []):
-        rank = partner["rank"]
-        handle = partner["username"]
-        name = partner.get("name", "")
-        score = partner.get("interaction_score", 0)
         followers = partner.get("followers")
-        followers_str = f"{followers:,}" if followers is not None else "N/A"
-
-        lines += [
-            f"### {rank}. @{handle} — {name}",
-            f"_Interaction score: {score} | Followers: {followers_str}_",
-            "",
-        ]
+        buf.write(
+            _PARTNER_TPL.format(
+                rank=partner["rank"],
+                handle=partner["username"],
+                name=partner.get("name", ""),
+                score=partner.get("interaction_score", 0),
+                followers_str=f"{followers:,}" if followers is not None else "N/A",
+            )
+        )
 
         analysis = partner.get("analysis", {})
         if analysis.get("hook_analysis"):
-            lines += [f"**Hook style:** {analysis['hook_analysis']}", ""]
+            buf.write(f"**Hook style:** {analysis['hook_analysis']}\n\n")
         if analysis.get("tone"):
-            lines += [f"**Tone:** {analysis['tone']}", ""]
+            buf.write(f"**Tone:** {analysis['tone']}\n\n")
         if analysis.get("content_types"):
-            lines += [f"**Content types:** {', '.join(analysis['content_types'])}", ""]
+            buf.write(f"**Content types:** {', '.join(analysis['content_types'])}\n\n")
         if analysis.get("patterns"):
-            lines += ["**Patterns:**"]
-            for p in analysis["patterns"]:
-                lines += [f"- {p}"]
-            lines += [""]
+            buf.write("**Patterns:**\n")
+            _write_bullets(buf, analysis["patterns"])
+            buf.write("\n")
         if analysis.get("best_practices"):
-            lines += ["**Best practices:**"]
-            for bp in analysis["best_practices"]:
-                lines += [f"- {bp}"]
-            lines += [""]
+            buf.write("**Best practices:**\n")
+            _write_bullets(buf, analysis["best_practices"])
+            buf.write("\n")
 
         for i, tweet in enumerate(partner.get("top_tweets", []), start=1):
-            m = tweet.get("metrics", {})
-            lines += [
-                f"#### Tweet {i} (score {tweet.get('score', 0):.0f})",
-                f"> {tweet.get('text', '').replace(chr(10), ' ')}",
-                "",
-                f"Likes: {m.get('like_count', 0)} | "
-                f"RTs: {m.get('retweet_count', 0)} | "
-                f"Replies: {m.get('reply_count', 0)} | "
-                f"Quotes: {m.get('quote_count', 0)}",
-                f"[View tweet]({tweet.get('url', '')})",
-                "",
-            ]
-
-        lines += ["---", ""]
-
-    return "\n".join(lines)
+            m = tweet.metrics
+            buf.write(
+                _TWEET_TPL.format_map(
+                    {
+                        "i": i,
+                        "score": tweet.score,
+                        "text": tweet.text.replace("\n", " "),
+                        "like_count": m.get("like_count", 0),
+                        "retweet_count": m.get("retweet_count", 0),
+                        "reply_count": m.get("reply_count", 0),
+                        "quote_count": m.get("quote_count", 0),
+                        "url": tweet.url,
+                    }
+                )
+            )
+
+        buf.write(_SEPARATOR)
+
+    # The list-based renderer joined lines with "\n", leaving no trailing newline
+    return buf.getvalue()[:-1]
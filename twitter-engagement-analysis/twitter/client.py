@@ -1,28 +1,92 @@
-"""Authenticated tweepy.Client factories."""
-import tweepy
+"""Authenticated async Twitter/X API v2 client and a rate-limit-aware GET helper."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import httpx
+import oauthlib.oauth1
+import orjson
+
 import config
+from twitter.throttle import limiter_for
+
+logger = logging.getLogger(__name__)
+
+_API_BASE = "https://api.twitter.com/2"
+_MAX_RETRIES = 4
+
+
+class _OAuth1(httpx.Auth):
+    """Signs every request with the OAuth 1.0a user-context credentials."""
+
+    def __init__(self) -> None:
+        self._signer = oauthlib.oauth1.Client(
+            config.TWITTER_API_KEY,
+            client_secret=config.TWITTER_API_KEY_SECRET,
+            resource_owner_key=config.TWITTER_ACCESS_TOKEN,
+            resource_owner_secret=config.TWITTER_ACCESS_TOKEN_SECRET,
+        )
 
+    def auth_flow(self, request: httpx.Request):
+        _, headers, _ = self._signer.sign(str(request.url), http_method=request.method)
+        request.headers["Authorization"] = headers["Authorization"]
+        yield request
 
-def make_app_client() -> tweepy.Client:
-    """Bearer-token client: user timelines, mentions, user tweets, search."""
-    return tweepy.Client(
-        bearer_token=config.TWITTER_BEARER_TOKEN,
-        wait_on_rate_limit=True,  # sleeps on 429 using x-rate-limit-reset header
+
+def make_client() -> httpx.AsyncClient:
+    """Shared client for every Twitter call, bearer-token authenticated by default.
+
+    Use as `async with make_client() as client:` so one HTTP/2 connection
+    pool (and its TLS sessions) is reused by every request of the run;
+    user-context calls pass `auth=make_user_auth()` per request.
+    """
+    return httpx.AsyncClient(
+        base_url=_API_BASE,
+        http2=True,
+        headers={"Authorization": f"Bearer {config.TWITTER_BEARER_TOKEN}"},
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=64),
+        timeout=30,
     )
 
 
-def make_user_client() -> tweepy.Client | None:
-    """OAuth 1.0a client: liked_tweets endpoint.
+def make_user_auth() -> httpx.Auth | None:
+    """OAuth 1.0a signer for user-context endpoints (liked_tweets).
 
     Returns None if OAuth credentials are not configured; the caller
     should skip the likes signal gracefully.
     """
     if not config.OAUTH_AVAILABLE:
         return None
-    return tweepy.Client(
-        consumer_key=config.TWITTER_API_KEY,
-        consumer_secret=config.TWITTER_API_KEY_SECRET,
-        access_token=config.TWITTER_ACCESS_TOKEN,
-        access_token_secret=config.TWITTER_ACCESS_TOKEN_SECRET,
-        wait_on_rate_limit=True,
-    )
+    return _OAuth1()
+
+
+async def get(
+    client: httpx.AsyncClient, path: str, params: dict, auth: httpx.Auth | None = None
+) -> dict:
+    """GET a v2 endpoint and return the JSON body as plain dicts and lists.
+
+    List-valued params are comma-joined as the v2 API expects. `auth`
+    overrides the client's bearer token for this request. Requests are
+    paced by the endpoint's header-driven RateLimiter; a 429 is retried once
+    the window resets (or with exponential backoff if the reset header is
+    missing). Any other error status raises httpx.HTTPStatusError.
+    """
+    query = {k: ",".join(v) if isinstance(v, list) else v for k, v in params.items()}
+    limiter = limiter_for(path, auth)
+    for attempt in range(_MAX_RETRIES + 1):
+        async with limiter:
+            response = await client.get(
+                path, params=query, auth=auth or httpx.USE_CLIENT_DEFAULT
+            )
+        limiter.update(response)
+        if response.status_code != 429 or attempt == _MAX_RETRIES:
+            break
+        if "x-rate-limit-reset" in response.headers:
+            logger.warning("Rate limited on %s — retrying after window reset.", path)
+        else:
+            wait = 2**attempt  # 1s, 2s, 4s, 8s
+            logger.warning("Rate limited on %s — retrying in %ds.", path, wait)
+            await asyncio.sleep(wait)
+    response.raise_for_status()
+    return orjson.loads(response.content)
@@ -0,0 +1,81 @@
+"""Per-endpoint request pacing driven by Twitter's rate-limit headers.
+
+Each (auth context, endpoint) pair gets one RateLimiter whose budget is
+seeded from the x-rate-limit-remaining / x-rate-limit-reset headers of its
+last response, so pages are fetched back to back while quota lasts and only
+wait once the window is actually exhausted.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Numeric IDs and usernames in a path are parameters, not separate endpoints
+_PATH_PARAM_RE = re.compile(r"(?<=/)\d+(?=/|$)|(?<=/by/username/)[^/]+")
+
+
+def endpoint_key(path: str) -> str:
+    """Collapse a request path to its endpoint template, e.g. /users/:id/tweets."""
+    return _PATH_PARAM_RE.sub(":id", path)
+
+
+class RateLimiter:
+    """Token bucket for one endpoint, refilled from the response headers.
+
+    Use as `async with limiter:` around a single request, then pass the
+    response to update(). Check-and-deduct never awaits in between, so
+    concurrent coroutines sharing a limiter need no lock.
+    """
+
+    def __init__(self) -> None:
+        self.remaining: int | None = None  # unknown until the first response
+        self.reset_at = 0.0  # epoch seconds, as sent by the API
+
+    async def __aenter__(self) -> None:
+        while self.remaining is not None and self.remaining <= 0:
+            delay = self.reset_at - time.time()
+            if delay <= 0:
+                self.remaining = None  # window reopened; next response reseeds it
+                break
+            logger.info("Rate-limit window exhausted — waiting %.0fs.", delay + 1)
+            await asyncio.sleep(delay + 1)
+        if self.remaining is not None:
+            self.remaining -= 1
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        pass
+
+    def update(self, response: httpx.Response) -> None:
+        """Reseed the bucket from the response's rate-limit headers."""
+        remaining = response.headers.get("x-rate-limit-remaining")
+        reset = response.headers.get("x-rate-limit-reset")
+        if response.status_code == 429:
+            # A 429 can still report remaining > 0 (e.g. the 24-hour app cap
+            # behind a 15-minute window); always wait for the reset it names
+            self.remaining = 0
+        elif remaining is not None:
+            self.remaining = int(remaining)
+        if reset is not None:
+            self.reset_at = float(reset)
+
+
+_limiters: dict[tuple[int, str], RateLimiter] = {}
+
+
+def limiter_for(path: str, auth: httpx.Auth | None = None) -> RateLimiter:
+    """Return the shared limiter for this endpoint under the given auth.
+
+    Twitter meters app (bearer) and user (OAuth) quotas separately, so each
+    auth object gets its own limiters; None is the client's bearer token.
+    """
+    key = (id(auth) if auth is not None else 0, endpoint_key(path))
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limiter = _limiters[key] = RateLimiter()
+    return limiter
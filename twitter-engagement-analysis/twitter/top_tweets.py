@@ -1,14 +1,40 @@
 """Fetch and score the top N tweets for a given user."""
 from __future__ import annotations
 
+import heapq
 import logging
-import time
+from dataclasses import dataclass
+from operator import itemgetter
 
-import tweepy
+import httpx
+
+from twitter.client import get
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True)
+class Tweet:
+    """A scored tweet, as passed to the analyzer, cache and report builder.
+
+    orjson serialises slotted dataclasses natively, so instances go straight
+    into the disk cache and the JSON report without conversion.
+    """
+
+    id: str
+    text: str
+    created_at: str
+    lang: str | None
+    metrics: dict
+    score: float
+    url: str
+
+
+def as_tweets(items: list) -> list[Tweet]:
+    """Rehydrate cached tweets (dicts from disk, or Tweets from the memory layer)."""
+    return [t if isinstance(t, Tweet) else Tweet(**t) for t in items]
+
+
 def engagement_score(metrics: dict) -> float:
     """Weighted engagement score for a tweet.
 
@@ -28,55 +54,54 @@ def engagement_score(metrics: dict) -> float:
     )
 
 
-def fetch_top_tweets(
-    client: tweepy.Client,
+async def fetch_top_tweets_async(
+    client: httpx.AsyncClient,
     user_id: str,
     n: int = 3,
     fetch_limit: int = 100,
-) -> list[dict]:
+) -> list[Tweet]:
     """Return the top n tweets by engagement score for the given user.
 
     Only original tweets and replies are considered; bare retweets are excluded
     because their engagement metrics belong to the original author.
 
     Args:
-        client: Authenticated tweepy.Client.
+        client: Bearer-token client from twitter.client.make_client().
         user_id: Numeric Twitter user ID.
         n: Number of top tweets to return.
         fetch_limit: How many recent tweets to scan (max 100 per call without pagination).
 
     Returns:
-        List of dicts sorted by descending engagement score.
+        List of Tweets sorted by descending engagement score.
     """
     try:
-        response = client.get_users_tweets(
-            user_id,
-            tweet_fields=["public_metrics", "created_at", "text", "entities", "lang"],
-            max_results=min(fetch_limit, 100),
-            exclude=["retweets"],  # only original content + replies
+        body = await get(
+            client,
+            f"/users/{user_id}/tweets",
+            {
+                "tweet.fields": ["public_metrics", "created_at", "text", "entities", "lang"],
+                "max_results": min(fetch_limit, 100),
+                "exclude": ["retweets"],  # only original content + replies
+            },
         )
-        time.sleep(1)  # per-second rate-limit guard
-    except tweepy.errors.Forbidden as exc:
+    except httpx.HTTPStatusError as exc:
         logger.warning("Cannot fetch tweets for user %s: %s", user_id, exc)
         return []
-    except tweepy.errors.TweepyException as exc:
-        logger.error("Tweepy error fetching tweets for user %s: %s", user_id, exc)
+    except httpx.HTTPError as exc:
+        logger.error("HTTP error fetching tweets for user %s: %s", user_id, exc)
         return []
 
-    all_tweets: list[dict] = []
-    for tweet in response.data or []:
-        m = dict(tweet.public_metrics) if tweet.public_metrics else {}
-        all_tweets.append(
-            {
-                "id": str(tweet.id),
-                "text": tweet.text,
-                "created_at": str(tweet.created_at),
-                "lang": getattr(tweet, "lang", None),
-                "metrics": m,
-                "score": engagement_score(m),
-                "url": f"https://twitter.com/i/web/status/{tweet.id}",
-            }
+    # Score first and only build Tweets for the n winners
+    scored = ((engagement_score(t.get("public_metrics", {})), t) for t in body.get("data", []))
+    return [
+        Tweet(
+            id=tweet["id"],
+            text=tweet["text"],
+            created_at=tweet.get("created_at", ""),
+            lang=tweet.get("lang"),
+            metrics=tweet.get("public_metrics", {}),
+            score=score,
+            url=f"https://twitter.com/i/web/status/{tweet['id']}",
         )
-
-    all_tweets.sort(key=lambda t: t["score"], reverse=True)
-    return all_tweets[:n]
+        for score, tweet in heapq.nlargest(n, scored, key=itemgetter(0))
+    ]
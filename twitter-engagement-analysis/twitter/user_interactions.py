@@ -9,11 +9,18 @@ Signals collected:
 """
 from __future__ import annotations
 
+import asyncio
 import logging
-import time
-from collections import defaultdict
+from collections import Counter, OrderedDict, deque
+from contextlib import aclosing
+from datetime import date
+from operator import itemgetter
+from typing import AsyncIterator, Awaitable, Callable
 
-import tweepy
+import httpx
+
+from cache import disk_cache as cache
+from twitter.client import get
 
 logger = logging.getLogger(__name__)
 
@@ -25,126 +32,425 @@ WEIGHTS = {
     "like": 1,
 }
 
-TWEET_FIELDS = [
-    "created_at",
-    "author_id",
-    "public_metrics",
-    "referenced_tweets",
-    "in_reply_to_user_id",
-    "entities",
-]
-EXPANSIONS = ["author_id", "referenced_tweets.id", "in_reply_to_user_id"]
-USER_FIELDS = ["username", "name", "public_metrics"]
-
-
-def _classify_tweet(tweet) -> tuple[str, str | None]:
-    """Return (interaction_type, target_user_id) for a tweet authored by the tracked user."""
-    if not tweet.referenced_tweets:
-        return ("original", None)
-    for ref in tweet.referenced_tweets:
-        if ref.type == "replied_to":
-            return ("reply", str(tweet.in_reply_to_user_id) if tweet.in_reply_to_user_id else None)
-        if ref.type == "quoted":
-            return ("quote", str(ref.id))
-        if ref.type == "retweeted":
-            return ("retweet", str(ref.id))
-    return ("original", None)
-
-
-def build_interaction_scores(
+# Only the fields the classifiers read: payload size is dominated by
+# entities/public_metrics, and user objects are resolved later in main.py.
+# No expansions either: authors of quoted/retweeted tweets are looked up once
+# per run (_resolve_ref_authors) instead of riding along on every page.
+TWEET_FIELDS = ["referenced_tweets", "in_reply_to_user_id"]
+
+# WEIGHTS unpacked once so the per-tweet loops skip the dict lookup
+_W_REPLY = WEIGHTS["reply"]
+_W_QUOTE = WEIGHTS["quote"]
+_W_RETWEET = WEIGHTS["retweet"]
+_W_MENTION = WEIGHTS["mention"]
+_W_LIKE = WEIGHTS["like"]
+
+# Interaction kinds returned by _classify_tweet
+_ORIGINAL, _REPLY, _QUOTE, _RETWEET = range(4)
+_REF_KINDS = {"replied_to": _REPLY, "quoted": _QUOTE, "retweeted": _RETWEET}
+
+
+def _classify_tweet(tweet: dict) -> tuple[int, str | None]:
+    """Return (kind, target_id) for a tweet authored by the tracked user.
+
+    target_id is the replied-to user ID for _REPLY and the referenced tweet
+    ID for _QUOTE / _RETWEET.
+    """
+    refs = tweet.get("referenced_tweets")
+    if not refs:
+        return (_ORIGINAL, None)
+    # Only the first reference is classified, deliberately: a quote-reply
+    # carries both replied_to and quoted, and counts once, as whichever is listed first
+    ref = refs[0]
+    kind = _REF_KINDS.get(ref["type"], _ORIGINAL)
+    if kind == _REPLY:
+        return (kind, tweet.get("in_reply_to_user_id"))
+    if kind:
+        return (kind, ref["id"])
+    return (_ORIGINAL, None)
+
+
+async def _pages(
+    client: httpx.AsyncClient,
+    path: str,
+    params: dict,
+    limit: int,
+    auth: httpx.Auth | None = None,
+) -> AsyncIterator[dict]:
+    """Yield up to `limit` response bodies of a paginated v2 endpoint, 100 tweets each.
+
+    The request for page N+1 is in flight while the caller processes page N,
+    so parsing and scoring overlap the network round trip; there is still at
+    most one request outstanding per endpoint.
+    """
+    if limit < 1:
+        return
+    params = {**params, "max_results": 100}
+    body = await get(client, path, params, auth)
+    for page in range(1, limit + 1):
+        next_token = body.get("meta", {}).get("next_token")
+        if page == limit or not next_token:
+            yield body
+            return
+        params = {**params, "pagination_token": next_token}
+        prefetch = asyncio.create_task(get(client, path, params, auth))
+        try:
+            yield body
+        except BaseException:
+            prefetch.cancel()
+            raise
+        body = await prefetch
+
+
+# Timeline and mention history is immutable, so it is kept far longer than
+# the interaction scores built from it
+_HISTORY_NS = "signal_history"
+_HISTORY_TTL = 30 * 24.0
+
+# Referenced tweet ID → author ID, shared across runs
+_AUTHOR_NS = "tweet_author"
+
+# Ranking depth watched by the stable_pages early stop
+_STABLE_TOP = 50
+
+
+async def _paginate_signal(
+    client: httpx.AsyncClient,
+    label: str,
+    path: str,
+    params: dict,
+    max_tweets: int,
+    to_rows: Callable[[dict], list[list]],
+    history_key: str | None = None,
+    finish: Callable[[httpx.AsyncClient, list[list]], Awaitable[list[list]]] | None = None,
+    stable_pages: int | None = None,
+    auth: httpx.Auth | None = None,
+) -> AsyncIterator[Counter[str]]:
+    """Fetch up to `max_tweets` tweets of one signal, yielding partial scores per page.
+
+    Each row is [tweet_id, partner_id or None, weight], newest first. With
+    `history_key` (since_id-capable endpoints only), rows from earlier runs
+    are cached under that key and only newer tweets are requested, so a
+    repeat run costs a single page when nothing has changed; the cached rows
+    still in the window are yielded last, unless the page limit was reached
+    before the since_id fetch caught up with them. `finish`, if given, completes the
+    freshly fetched rows in place before they are stored and returns the rows
+    it completed, which are yielded as one more batch.
+
+    With `stable_pages`, a full (non-incremental) fetch stops once the top
+    partners have not changed for that many consecutive pages; the long
+    tail of later pages rarely moves the ranking. A fetch cut short this way
+    is not stored as history.
+
+    An error status is logged and whatever was fetched so far is kept.
+    """
+    logger.info("Fetching %s…", label)
+    cached: list[list] = []
+    if history_key:
+        cached = cache.get(_HISTORY_NS, history_key, _HISTORY_TTL) or []
+        if cached:
+            params = {**params, "since_id": cached[0][0]}
+    fresh: list[list] = []
+    next_token: str | None = None
+    running: Counter[str] = Counter()
+    recent_tops: deque[set[str]] = deque(maxlen=stable_pages or 1)
+    try:
+        async with aclosing(_pages(client, path, params, max_tweets // 100, auth)) as pages:
+            async for body in pages:
+                next_token = body.get("meta", {}).get("next_token")
+                page_rows = to_rows(body)
+                fresh.extend(page_rows)
+                page_scores = _tally(page_rows)
+                yield page_scores
+                # An early stop on an incremental fetch would leave a gap before the cached rows
+                if not stable_pages or cached:
+                    continue
+                running.update(page_scores)
+                recent_tops.append({k for k, _ in running.most_common(_STABLE_TOP)})
+                if len(recent_tops) == stable_pages and all(
+                    top == recent_tops[0] for top in recent_tops
+                ):
+                    logger.info(
+                        "  %s: top partners unchanged for %d pages — stopping early.",
+                        label,
+                        stable_pages,
+                    )
+                    # The older pages were never fetched; a stored history would
+                    # keep later since_id runs below max_tweets for good
+                    history_key = None
+                    break
+        if finish is not None:
+            yield _tally(await finish(client, fresh))
+    except httpx.HTTPStatusError as exc:
+        logger.warning("Cannot fetch %s (tier restriction?): %s", label, exc)
+        history_key = None  # a partial fetch would leave a gap in the stored history
+    if next_token is not None and cached:
+        # The page limit ran out with newer tweets still unfetched (pages are
+        # often short of 100), so the cached rows no longer join up with these
+        logger.info("  %s: more new tweets than the page limit — dropping cached history.", label)
+        cached = []
+    kept = cached[: max(0, max_tweets - len(fresh))]
+    if kept:
+        yield _tally(kept)
+    if history_key:
+        logger.info("  %s: %d new tweets, %d from cache.", label, len(fresh), len(cached))
+        cache.set(_HISTORY_NS, history_key, fresh + kept)
+
+
+def _tally(rows: list[list]) -> Counter[str]:
+    """Sum row weights per partner.
+
+    Counter tallies the (partner, weight) pairs in C, so the Python loop only
+    visits each distinct pair once instead of once per tweet.
+    """
+    scores: Counter[str] = Counter()
+    if not rows:
+        return scores
+    pairs = zip(map(itemgetter(1), rows), map(itemgetter(2), rows))
+    for (partner_id, weight), n in Counter(pairs).items():
+        if partner_id:
+            scores[partner_id] += weight * n
+    return scores
+
+
+def _timeline_rows(body: dict) -> list[list]:
+    """Rows for the user's own tweets.
+
+    Quote and retweet rows carry the referenced tweet ID as a fourth column
+    until _resolve_ref_authors replaces it with that tweet's author.
+    """
+    rows = []
+    for tweet in body.get("data", ()):
+        kind, target_id = _classify_tweet(tweet)
+        if not target_id:
+            rows.append([tweet["id"], None, 0])
+        elif kind == _REPLY:
+            rows.append([tweet["id"], target_id, _W_REPLY])
+        else:
+            weight = _W_QUOTE if kind == _QUOTE else _W_RETWEET
+            rows.append([tweet["id"], None, weight, target_id])
+    return rows
+
+
+async def _resolve_ref_authors(client: httpx.AsyncClient, rows: list[list]) -> list[list]:
+    """Set the partner of quote/retweet rows to the referenced tweet's author.
+
+    Returns the rows that were completed.
+    """
+    pending = [row for row in rows if len(row) == 4]
+    if not pending:
+        return pending
+    ref_ids = dict.fromkeys(row[3] for row in pending)
+    # A tweet's author never changes, so lookups from earlier runs are reused
+    author_of: dict[str, str] = cache.get_many(_AUTHOR_NS, ref_ids, _HISTORY_TTL)
+    missing = [ref_id for ref_id in ref_ids if ref_id not in author_of]
+    # /tweets accepts up to 100 IDs per call; request all batches at once
+    batches = [missing[i : i + 100] for i in range(0, len(missing), 100)]
+    bodies = await asyncio.gather(
+        *(
+            get(client, "/tweets", {"ids": batch, "tweet.fields": ["author_id"]})
+            for batch in batches
+        )
+    )
+    fetched = {
+        t["id"]: t["author_id"] for body in bodies for t in body.get("data", ()) if "author_id" in t
+    }
+    cache.bulk_set(_AUTHOR_NS, fetched, ttl_hours=_HISTORY_TTL)
+    author_of.update(fetched)
+    for row in pending:
+        row[1] = author_of.get(row.pop())  # deleted/protected tweets stay None
+    return pending
+
+
+def _mention_rows(body: dict) -> list[list]:
+    return [[t["id"], t.get("author_id"), _W_MENTION] for t in body.get("data", ())]
+
+
+def _like_rows(body: dict) -> list[list]:
+    return [[t["id"], t.get("author_id"), _W_LIKE] for t in body.get("data", ())]
+
+
+def fetch_timeline(
+    client: httpx.AsyncClient, user_id: str, max_own_tweets: int
+) -> AsyncIterator[Counter[str]]:
+    """Signal 1: replies, quotes and retweets on the user's own timeline.
+
+    Always paginated in full: quote and retweet partners are only known once
+    _resolve_ref_authors runs after the last page, so a stable_pages check
+    would rank replies alone and stop early on quote/retweet-heavy accounts.
+    """
+    return _paginate_signal(
+        client,
+        f"own timeline of {user_id}",
+        f"/users/{user_id}/tweets",
+        {"tweet.fields": TWEET_FIELDS},
+        max_own_tweets,
+        _timeline_rows,
+        history_key=f"{user_id}_timeline",
+        finish=_resolve_ref_authors,
+    )
+
+
+def fetch_mentions(
+    client: httpx.AsyncClient,
     user_id: str,
-    app_client: tweepy.Client,
-    user_client: tweepy.Client | None = None,
+    max_mentions: int,
+    stable_pages: int | None = None,
+) -> AsyncIterator[Counter[str]]:
+    """Signal 2: incoming mentions of the user."""
+    return _paginate_signal(
+        client,
+        f"mentions of {user_id}",
+        f"/users/{user_id}/mentions",
+        {"tweet.fields": ["author_id"]},
+        max_mentions,
+        _mention_rows,
+        history_key=f"{user_id}_mentions",
+        stable_pages=stable_pages,
+    )
+
+
+def fetch_likes(
+    client: httpx.AsyncClient,
+    user_auth: httpx.Auth,
+    user_id: str,
+    max_liked: int,
+    stable_pages: int | None = None,
+) -> AsyncIterator[Counter[str]]:
+    """Signal 3: tweets the user has liked (OAuth 1.0a user auth required).
+
+    liked_tweets is ordered by like time and takes no since_id, so it is
+    always fetched in full rather than through the history cache.
+    """
+    return _paginate_signal(
+        client,
+        f"liked tweets of {user_id}",
+        f"/users/{user_id}/liked_tweets",
+        {"tweet.fields": ["author_id"]},
+        max_liked,
+        _like_rows,
+        stable_pages=stable_pages,
+        auth=user_auth,
+    )
+
+
+async def iter_interaction_scores(
+    user_id: str,
+    client: httpx.AsyncClient,
+    user_auth: httpx.Auth | None = None,
     max_own_tweets: int = 800,
     max_mentions: int = 800,
     max_liked: int = 1000,
+    stable_pages: int | None = None,
+) -> AsyncIterator[tuple[str, int, str]]:
+    """Yield (partner_id, score_delta, signal) as each page of each signal lands.
+
+    The three signals hit independent endpoints with separate rate-limit
+    buckets, so they paginate concurrently and their pages are yielded in
+    arrival order. Summing the deltas per partner gives the final scores;
+    see build_interaction_scores for the arguments.
+    """
+    # v2 JSON carries IDs as strings; normalise once so the self-ID matches the keys
+    user_id = str(user_id)
+    signals = {
+        "timeline": fetch_timeline(client, user_id, max_own_tweets),
+        "mentions": fetch_mentions(client, user_id, max_mentions, stable_pages),
+    }
+    if user_auth is None:
+        logger.warning(
+            "OAuth 1.0a credentials not configured — skipping liked-tweets signal. "
+            "Set TWITTER_API_KEY / ACCESS_TOKEN vars to enable it."
+        )
+    else:
+        signals["likes"] = fetch_likes(client, user_auth, user_id, max_liked, stable_pages)
+
+    queue: asyncio.Queue[tuple[str, Counter[str]] | None] = asyncio.Queue()
+
+    async def pump(signal: str, pages: AsyncIterator[Counter[str]]) -> None:
+        try:
+            async for page_scores in pages:
+                await queue.put((signal, page_scores))
+        finally:
+            await queue.put(None)  # one sentinel per signal
+
+    tasks = [asyncio.create_task(pump(name, pages)) for name, pages in signals.items()]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await queue.get()
+            if item is None:
+                remaining -= 1
+                continue
+            signal, page_scores = item
+            for partner_id, delta in page_scores.items():
+                if partner_id != user_id:  # skip self-interactions
+                    yield partner_id, delta, signal
+        await asyncio.gather(*tasks)  # surface any unexpected signal failure
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+# In-process memo of build_interaction_scores results, LRU-ordered
+_MEMO_MAXSIZE = 32
+_scores_memo: OrderedDict[tuple, dict[str, int]] = OrderedDict()
+
+
+async def build_interaction_scores(
+    user_id: str,
+    client: httpx.AsyncClient,
+    user_auth: httpx.Auth | None = None,
+    max_own_tweets: int = 800,
+    max_mentions: int = 800,
+    max_liked: int = 1000,
+    top_k: int | None = None,
+    stable_pages: int | None = None,
 ) -> dict[str, int]:
     """Return a mapping of {twitter_user_id: interaction_score} for all partners.
 
+    Results are memoised in-process per user, day and arguments, so repeat
+    calls within a run (or a long-lived process) skip the fetch entirely.
+
     Args:
         user_id: Numeric Twitter user ID of the account being analysed.
-        app_client: Bearer-token tweepy.Client (for timeline & mentions).
-        user_client: OAuth 1.0a tweepy.Client (for liked tweets). May be None.
+        client: Shared client from twitter.client.make_client().
+        user_auth: OAuth 1.0a signer (for liked tweets). May be None.
         max_own_tweets: Maximum number of the user's own tweets to inspect.
         max_mentions: Maximum number of mention tweets to inspect.
         max_liked: Maximum number of liked tweets to inspect.
+        top_k: If set, return only the k highest-scoring partners, in rank order.
+        stable_pages: Opt-in. Stop mention / liked-tweet pagination early once
+            that signal's top partners have not changed for this many pages.
+            This trades exact scores for fewer requests: the truncated signal
+            is summed against full timeline scores, and a fetch cut short is
+            not stored as since_id history. None (default) fetches every page.
     """
-    scores: dict[str, int] = defaultdict(int)
+    key = (
+        str(user_id),
+        date.today().isoformat(),
+        user_auth is not None,
+        max_own_tweets,
+        max_mentions,
+        max_liked,
+        top_k,
+        stable_pages,
+    )
+    memo = _scores_memo.get(key)
+    if memo is not None:
+        _scores_memo.move_to_end(key)
+        return dict(memo)  # copy, so callers cannot mutate the memo
 
-    # ── Signal 1: own timeline (replies, quotes, retweets) ───────────────────
-    logger.info("Fetching own timeline for user %s…", user_id)
-    try:
-        for response in tweepy.Paginator(
-            app_client.get_users_tweets,
-            user_id,
-            tweet_fields=TWEET_FIELDS,
-            expansions=EXPANSIONS,
-            user_fields=USER_FIELDS,
-            max_results=100,
-            limit=max_own_tweets // 100,
-        ):
-            includes_tweets = {
-                str(t.id): t
-                for t in (response.includes or {}).get("tweets", [])
-            }
-
-            for tweet in response.data or []:
-                kind, target_id = _classify_tweet(tweet)
-                if kind == "reply" and target_id:
-                    scores[target_id] += WEIGHTS["reply"]
-                elif kind in ("quote", "retweet") and target_id:
-                    ref_tweet = includes_tweets.get(target_id)
-                    if ref_tweet and ref_tweet.author_id:
-                        scores[str(ref_tweet.author_id)] += WEIGHTS[kind]
-
-            time.sleep(0.5)  # per-second guard
-    except tweepy.errors.Forbidden as exc:
-        logger.warning("Cannot fetch own timeline (tier restriction?): %s", exc)
-
-    # ── Signal 2: incoming mentions ───────────────────────────────────────────
-    logger.info("Fetching mentions for user %s…", user_id)
-    try:
-        for response in tweepy.Paginator(
-            app_client.get_users_mentions,
-            user_id,
-            tweet_fields=["author_id", "public_metrics"],
-            expansions=["author_id"],
-            user_fields=["username"],
-            max_results=100,
-            limit=max_mentions // 100,
-        ):
-            for tweet in response.data or []:
-                if tweet.author_id:
-                    scores[str(tweet.author_id)] += WEIGHTS["mention"]
-            time.sleep(0.5)
-    except tweepy.errors.Forbidden as exc:
-        logger.warning("Cannot fetch mentions (tier restriction?): %s", exc)
-
-    # ── Signal 3: liked tweets (OAuth required) ───────────────────────────────
-    if user_client is None:
-        logger.warning(
-            "OAuth 1.0a credentials not configured — skipping liked-tweets signal. "
-            "Set TWITTER_API_KEY / ACCESS_TOKEN vars to enable it."
-        )
+    scores: Counter[str] = Counter()
+    async for partner_id, delta, _ in iter_interaction_scores(
+        user_id, client, user_auth, max_own_tweets, max_mentions, max_liked, stable_pages
+    ):
+        scores[partner_id] += delta
+
+    if top_k is not None:
+        result = dict(scores.most_common(top_k))  # heap-select, O(n log k)
     else:
-        logger.info("Fetching liked tweets for user %s…", user_id)
-        try:
-            for response in tweepy.Paginator(
-                user_client.get_liked_tweets,
-                user_id,
-                tweet_fields=["author_id"],
-                expansions=["author_id"],
-                max_results=100,
-                limit=max_liked // 100,
-            ):
-                for tweet in response.data or []:
-                    if tweet.author_id:
-                        scores[str(tweet.author_id)] += WEIGHTS["like"]
-                time.sleep(0.5)
-        except tweepy.errors.Forbidden as exc:
-            logger.warning("Cannot fetch liked tweets: %s", exc)
-
-    # Remove self-interactions
-    scores.pop(user_id, None)
-
-    return dict(scores)
+        result = dict(scores)
+    _scores_memo[key] = result
+    if len(_scores_memo) > _MEMO_MAXSIZE:
+        _scores_memo.popitem(last=False)
+    return dict(result)